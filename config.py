@@ -1,6 +1,9 @@
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Mapping
+
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
-from typing import List
 
 class Settings(BaseSettings):
     """Configuración base del proyecto"""
@@ -33,10 +36,16 @@ class Settings(BaseSettings):
 # Instancia global de configuración
 settings = Settings()
 
-def get_config_summary() -> dict:
-    """Devuelve un resumen simple de la configuración actual."""
-    return {
+@lru_cache(maxsize=1)
+def get_config_summary() -> Mapping:
+    """
+    Devuelve un resumen simple de la configuración actual.
+    Es función pura de settings (fijo tras el arranque), así que el dict
+    se arma una sola vez; MappingProxyType lo deja de solo lectura para
+    que ningún llamador pueda mutar la instancia compartida.
+    """
+    return MappingProxyType({
         "app_name": settings.app_name,
         "version": settings.app_version,
         "debug": settings.debug
-    }
\ No newline at end of file
+    })
\ No newline at end of file
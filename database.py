@@ -4,17 +4,31 @@ Persistencia con JSON (fase 1):
 - Crea el archivo si no existe.
 - Implementa carga (load_data) y guardado (save_data) del catálogo.
 - Mantiene la estructura en memoria como dicts simples (aún no Pydantic Models).
+- Las mutaciones se registran en un journal append-only (inventory.log);
+  el snapshot completo solo se reescribe al compactar.
 """
 
+from collections import defaultdict
 from pathlib import Path
-import json
+import atexit
+import contextlib
+import logging
+import mmap
+import os
+
+import orjson
 from typing import Dict, List, Optional
 
+log = logging.getLogger(__name__)
 
 DEFAULT_DB_FILE = "inventory.json"
 
+# Operaciones acumuladas en el journal antes de forzar una compactación
+COMPACT_THRESHOLD = 500
+
 # Ruta absoluta segura al JSON, al lado de este archivo .py
-DB_PATH: Path = Path(__file__).with_name(DEFAULT_DB_FILE)
+# (resuelta una sola vez al importar el módulo)
+DB_PATH: Path = Path(__file__).resolve().with_name(DEFAULT_DB_FILE)
 
 
 def get_db_path() -> Path:
@@ -22,17 +36,18 @@ def get_db_path() -> Path:
     return DB_PATH
 
 
-def ensure_db_file_exists() -> Path:
+def ensure_db_file_exists(path: Optional[Path] = None) -> Path:
     """
-    Crea el archivo inventory.json si no existe.
+    Crea el archivo de base de datos si no existe (por defecto inventory.json).
     No escribe datos todavía, solo garantiza que el archivo esté presente.
     """
-    path = get_db_path()
+    if path is None:
+        path = get_db_path()
     if not path.exists():
         path.parent.mkdir(parents=True, exist_ok=True)
         path.touch(exist_ok=True)
         # Inicializamos con una estructura mínima válida
-        path.write_text(json.dumps({"materials": [], "next_id": 1}, ensure_ascii=False, indent=2), encoding="utf-8")
+        path.write_bytes(orjson.dumps({"materials": [], "next_id": 1}, option=orjson.OPT_INDENT_2))
     return path
 
 
@@ -40,20 +55,52 @@ class MaterialDatabase:
     """
     Clase que actúa como base de datos en memoria para el inventario de materiales.
     Ahora incluye persistencia: load/save en inventory.json.
-    - Estructura en memoria: dict[int, dict]
+    - Estructura en memoria: lista de dicts + índice {id: posición en la lista}
+      (la lista es la misma que se serializa al snapshot, sin copia por guardado)
     - Formato en disco: {"materials": [ {...}, {...} ], "next_id": N}
     """
 
     def __init__(self, file_path: Optional[str] = None):
-        # Diccionario interno para almacenar materiales en memoria
-        self.materials: Dict[int, Dict] = {}
+        # Lista autoritativa de materiales + índice id -> posición
+        self._materials_list: List[Dict] = []
+        self._id_index: Dict[int, int] = {}
         self.next_id: int = 1  # ID incremental para nuevos materiales
 
+        # Índices auxiliares para búsquedas O(1) sin escanear materials.
+        # Ambos mapean a conjuntos de IDs: la API no garantiza SKU único,
+        # así que el índice tampoco puede asumirlo.
+        self._by_sku: Dict[str, set] = defaultdict(set)
+        self._by_category: Dict[str, set] = defaultdict(set)
+
         # Ruta del archivo; si no te pasan una, usamos la por defecto
         self._file_path: Path = Path(file_path) if file_path else get_db_path()
-        ensure_db_file_exists()  # Garantiza que el archivo exista con estructura básica
+        self._journal_path: Path = self._file_path.with_suffix(".log")
+
+        # Strings precalculados para open()/os.replace: evitan el dispatch
+        # de pathlib en cada operación del camino caliente
+        self._file_path_str: str = os.fspath(self._file_path)
+        self._tmp_path_str: str = os.fspath(
+            self._file_path.with_suffix(self._file_path.suffix + ".tmp"))
+
+        # Garantiza que el archivo exista con estructura básica
+        ensure_db_file_exists(self._file_path)
+
+        # Journal append-only: una línea JSON por mutación (orjson escribe bytes)
+        self._journal = open(self._journal_path, "ab")
+        self._dirty_ops: int = 0
+
+        # Estado para agrupar escrituras con batch()
+        self._batch_depth: int = 0
+        self._batch_dirty: bool = False
+
+        # Cache en bytes de la respuesta de listado; se invalida al mutar
+        self._list_cache_bytes: Optional[bytes] = None
+
         self.load_data()         # Hidrata la memoria con lo que haya en disco
 
+        # Compactamos al salir para dejar un snapshot limpio y el journal vacío
+        atexit.register(self._compact)
+
     # ---------------------------------------------------------------------
     # Persistencia
     # ---------------------------------------------------------------------
@@ -61,64 +108,241 @@ class MaterialDatabase:
         """
         Lee el archivo JSON y carga los materiales en memoria.
         Espera un JSON con llaves: "materials" (lista) y "next_id" (int).
-        Si el archivo está vacío o corrupto, re-inicializa estructura.
+        El snapshot se escribe de forma atómica (tmp + os.replace), así que
+        un archivo malformado indica un problema externo y se deja propagar
+        en vez de re-inicializar (y perder) los datos.
+        Después del snapshot, re-aplica las mutaciones pendientes del journal.
         """
-        try:
-            text = self._file_path.read_text(encoding="utf-8").strip()
-            if not text:
+        with open(self._file_path_str, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
                 # Si está vacío, inicializamos estructura básica
-                self.materials = {}
+                self._materials_list = []
+                self._id_index = {}
                 self.next_id = 1
-                self.save_data()
-                return
-
-            data = json.loads(text)
+                data = None
+            else:
+                # mmap le pasa los bytes del archivo directo a orjson,
+                # sin la copia intermedia que hacía read_bytes()
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    view = memoryview(mm)
+                    try:
+                        data = orjson.loads(view)
+                    finally:
+                        view.release()
 
+        if data is not None:
             # Validación mínima de estructura
             materials_list: List[Dict] = data.get("materials", [])
             next_id_val: int = data.get("next_id", 1)
 
-            # Cargar en memoria como dict {id: dict_material}
-            self.materials = {}
+            # Cargar en memoria como lista + índice {id: posición}
+            self._materials_list = []
+            self._id_index = {}
             for item in materials_list:
                 # Validación básica de que tenga id
                 material_id = item.get("id")
                 if isinstance(material_id, int):
-                    self.materials[material_id] = item
+                    self._put_record(material_id, item)
 
             # Si no viene next_id, lo calculamos como max_id + 1
             if isinstance(next_id_val, int) and next_id_val > 0:
                 self.next_id = next_id_val
             else:
-                self.next_id = (max(self.materials.keys()) + 1) if self.materials else 1
+                self.next_id = (max(self._id_index) + 1) if self._id_index else 1
 
-        except Exception as e:
-            # Si algo falla (JSON malformado, etc.), re-inicializamos seguro
-            print(f"[MaterialDatabase.load_data] Error al cargar datos: {e}")
-            self.materials = {}
-            self.next_id = 1
-            self.save_data()
+        # El journal puede contener mutaciones posteriores al snapshot
+        self._replay_journal()
 
-    def save_data(self) -> None:
+        # Reconstruimos los índices auxiliares en una sola pasada
+        # (siempre, aunque no haya journal que re-aplicar)
+        self._rebuild_indexes()
+
+    def _replay_journal(self) -> None:
+        """
+        Re-aplica sobre la memoria las mutaciones pendientes del journal.
+        Cada línea es un JSON: {"op": "put"|"del", "id": N, "rec": {...}}.
+        Las líneas incompletas (p.ej. crash a mitad de escritura) se ignoran.
+        """
+        if not self._journal_path.exists():
+            return
+        try:
+            lines = self._journal_path.read_bytes().splitlines()
+        except Exception:
+            log.exception("Error al leer el journal")
+            return
+
+        # ID más alto visto en cualquier entrada del journal, incluso si el
+        # material terminó borrado: un ID ya emitido nunca se reutiliza
+        max_seen_id = 0
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = orjson.loads(line)
+            except Exception:
+                continue
+            op = entry.get("op")
+            material_id = entry.get("id")
+            if isinstance(material_id, int) and material_id > max_seen_id:
+                max_seen_id = material_id
+            if op == "put" and isinstance(material_id, int):
+                self._put_record(material_id, entry.get("rec", {}))
+            elif op == "del":
+                self._pop_record(material_id)
+
+        # El journal puede haber emitido IDs más altos que el next_id del snapshot
+        if max_seen_id:
+            self.next_id = max(self.next_id, max_seen_id + 1)
+
+    # ---------------------------------------------------------------------
+    # Almacenamiento interno (lista + índice id -> posición)
+    # ---------------------------------------------------------------------
+    def _put_record(self, material_id: int, record: Dict) -> None:
+        """Inserta o reemplaza un registro en la lista, manteniendo el índice."""
+        idx = self._id_index.get(material_id)
+        if idx is None:
+            self._id_index[material_id] = len(self._materials_list)
+            self._materials_list.append(record)
+        else:
+            self._materials_list[idx] = record
+
+    def _pop_record(self, material_id: int) -> Optional[Dict]:
+        """
+        Quita un registro por ID con swap-pop: el último elemento ocupa el
+        hueco, así el borrado es O(1) sin desplazar el resto de la lista.
+        """
+        idx = self._id_index.pop(material_id, None)
+        if idx is None:
+            return None
+        record = self._materials_list[idx]
+        last = self._materials_list.pop()
+        if idx < len(self._materials_list):
+            self._materials_list[idx] = last
+            self._id_index[last["id"]] = idx
+        return record
+
+    # ---------------------------------------------------------------------
+    # Índices auxiliares (sku, categoría)
+    # ---------------------------------------------------------------------
+    def _rebuild_indexes(self) -> None:
+        """Reconstruye los índices por SKU y categoría desde cero."""
+        self._by_sku.clear()
+        self._by_category.clear()
+        for record in self._materials_list:
+            self._index_material(record["id"], record)
+
+    def _index_material(self, material_id: int, record: Dict) -> None:
+        """Agrega un material a los índices auxiliares."""
+        sku = record.get("sku")
+        if sku:
+            self._by_sku[sku].add(material_id)
+        category = record.get("category")
+        if category:
+            self._by_category[category].add(material_id)
+
+    def _unindex_material(self, material_id: int, record: Dict) -> None:
+        """Quita un material de los índices auxiliares."""
+        sku = record.get("sku")
+        if sku:
+            self._by_sku[sku].discard(material_id)
+        category = record.get("category")
+        if category:
+            self._by_category[category].discard(material_id)
+
+    def find_by_sku(self, sku: str) -> Optional[Dict]:
+        """
+        Devuelve un material con ese SKU en O(1), o None si no existe.
+        Si varios materiales comparten el SKU, devuelve el de menor ID.
+        """
+        ids = self._by_sku.get(sku)
+        if not ids:
+            return None
+        return self.get_material(min(ids))
+
+    def filter_by_category(self, category: str) -> List[Dict]:
+        """Devuelve los materiales de una categoría sin escanear toda la lista."""
+        return [self._materials_list[self._id_index[mid]]
+                for mid in sorted(self._by_category.get(category, ()))]
+
+    def _append_journal(self, entry: Dict) -> None:
+        """
+        Registra una mutación como línea JSON en el journal (O(1) por operación,
+        en lugar de reescribir el archivo completo). Compacta al superar el umbral.
+        """
+        try:
+            self._journal.write(orjson.dumps(entry) + b"\n")
+            # Dentro de un batch diferimos el flush hasta el final
+            if not self._batch_depth:
+                self._journal.flush()
+        except Exception:
+            log.exception("Error al escribir el journal")
+            return
+
+        self._dirty_ops += 1
+        if self._dirty_ops >= COMPACT_THRESHOLD and not self._batch_depth:
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Reescribe el snapshot completo de forma atómica (tmp + os.replace)
+        y vacía el journal. Se invoca al superar COMPACT_THRESHOLD o al salir.
         """
-        Vuelca el estado actual a disco en formato JSON.
-        Estructura:
-        {
-          "materials": [ {...}, {...} ],
-          "next_id": <int>
+        # La lista interna se serializa tal cual, sin re-alocar una copia
+        data = {
+            "materials": self._materials_list,
+            "next_id": self.next_id
         }
+        with open(self._tmp_path_str, "wb", buffering=1 << 20) as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            f.flush()
+            os.fsync(f.fileno())
+        # os.replace es atómico en POSIX: nunca queda un snapshot a medias
+        os.replace(self._tmp_path_str, self._file_path_str)
+
+        # El snapshot ya contiene todo: el journal puede vaciarse
+        self._journal.seek(0)
+        self._journal.truncate()
+        self._dirty_ops = 0
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Agrupa varias mutaciones en una sola escritura a disco.
+        Uso: `with db.batch(): ...` — dentro del bloque se suprimen los
+        flush intermedios y los save_data; al salir se hace un único flush
+        (y compactación, si algún save_data quedó pendiente).
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._journal.flush()
+                if self._batch_dirty:
+                    self._batch_dirty = False
+                    self.save_data()
+                elif self._dirty_ops >= COMPACT_THRESHOLD:
+                    # El chequeo del umbral se saltó dentro del batch
+                    self._compact()
+
+    def save_data(self) -> None:
+        """
+        Vuelca el estado actual a disco como snapshot JSON (compactación).
+        Las mutaciones individuales ya quedan persistidas en el journal;
+        esto solo reescribe el snapshot completo y vacía el journal.
+        Dentro de un batch() la compactación se difiere hasta el final.
         """
+        if self._batch_depth:
+            self._batch_dirty = True
+            return
         try:
-            data = {
-                "materials": list(self.materials.values()),
-                "next_id": self.next_id
-            }
-            self._file_path.write_text(
-                json.dumps(data, ensure_ascii=False, indent=2),
-                encoding="utf-8"
-            )
-        except Exception as e:
-            print(f"[MaterialDatabase.save_data] Error al guardar datos: {e}")
+            self._compact()
+        except Exception:
+            log.exception("Error al guardar datos")
 
     # ---------------------------------------------------------------------
     # Operaciones en memoria (con persistencia automática)
@@ -130,17 +354,65 @@ class MaterialDatabase:
         """
         material_id = self.next_id
         record = {"id": material_id, **material_data}
-        self.materials[material_id] = record
+        self._put_record(material_id, record)
         self.next_id += 1
+        self._index_material(material_id, record)
+        self._list_cache_bytes = None
 
-        # Guardamos tras cada cambio
-        self.save_data()
+        # Registramos la mutación en el journal
+        self._append_journal({"op": "put", "id": material_id, "rec": record})
         return record
 
+    def update_material(self, material_id: int, changes: Dict) -> Optional[Dict]:
+        """
+        Aplica cambios parciales sobre un material existente.
+        Devuelve el material actualizado, o None si el ID no existe.
+        """
+        material = self.get_material(material_id)
+        if material is None:
+            return None
+        # Los cambios pueden tocar sku/category: re-indexamos el registro
+        self._unindex_material(material_id, material)
+        material.update(changes)
+        self._index_material(material_id, material)
+        self._list_cache_bytes = None
+        self._append_journal({"op": "put", "id": material_id, "rec": material})
+        return material
+
+    def delete_material(self, material_id: int) -> bool:
+        """Elimina un material por ID. Devuelve True si existía."""
+        record = self._pop_record(material_id)
+        if record is None:
+            return False
+        self._unindex_material(material_id, record)
+        self._list_cache_bytes = None
+        self._append_journal({"op": "del", "id": material_id})
+        return True
+
     def list_materials(self) -> List[Dict]:
-        """Devuelve todos los materiales actualmente en memoria."""
-        return list(self.materials.values())
+        """
+        Devuelve todos los materiales actualmente en memoria.
+        Es la lista interna (sin copiar): los llamadores no deben mutarla.
+        """
+        return self._materials_list
 
     def get_material(self, material_id: int) -> Optional[Dict]:
         """Devuelve un material específico por ID (o None si no existe)."""
-        return self.materials.get(material_id)
\ No newline at end of file
+        idx = self._id_index.get(material_id)
+        return self._materials_list[idx] if idx is not None else None
+
+
+# Instancia única del proceso; se crea perezosamente en get_db()
+_INSTANCE: Optional[MaterialDatabase] = None
+
+
+def get_db() -> MaterialDatabase:
+    """
+    Devuelve la instancia única de MaterialDatabase.
+    Construirla es caro (lectura y parseo del JSON), así que se hace
+    una sola vez por proceso sin importar el orden de los imports.
+    """
+    global _INSTANCE
+    if _INSTANCE is None:
+        _INSTANCE = MaterialDatabase()
+    return _INSTANCE
\ No newline at end of file
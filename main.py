@@ -1,52 +1,62 @@
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from config import settings
-from models import MaterialCreate, ErrorResponse
 import materials
 
 # Inicializamos la aplicación usando la configuración centralizada
+# ORJSONResponse serializa con orjson (C), más rápido que json stdlib
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
-    debug=settings.debug
+    debug=settings.debug,
+    default_response_class=ORJSONResponse
 )
 
 # ========== EXCEPTION HANDLERS ==========
 
+# Payload constante del 500, armado una sola vez a nivel de módulo
+# (la forma es la de ErrorResponse, sin construir el modelo por request)
+_INTERNAL_ERR = {
+    "success": False,
+    "message": "Error interno del servidor",
+    "error_code": "INTERNAL_SERVER_ERROR",
+    "details": None
+}
+
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     """
     Formatea cualquier HTTPException (p.ej., 404 del GET-by-id) a nuestro JSON estándar.
     """
     msg = exc.detail if isinstance(exc.detail, str) else "Error en la solicitud"
-    payload = ErrorResponse(
-        success=False,
-        message=msg,
-        error_code=f"HTTP_{exc.status_code}",
-        details=None
-    ).model_dump()
-    return JSONResponse(status_code=exc.status_code, content=payload)
+    payload = {
+        "success": False,
+        "message": msg,
+        "error_code": f"HTTP_{exc.status_code}",
+        "details": None
+    }
+    return ORJSONResponse(status_code=exc.status_code, content=payload)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """
     Captura errores de validación de FastAPI/Pydantic (422) y los centra en un formato uniforme.
     """
-    # Procesar errores eliminando completamente los objetos no serializables
-    errors_list = []
-    
-    for error in exc.errors():
-        # Crear un nuevo diccionario con solo strings
-        clean_error = {
-            "field": " -> ".join(str(x) for x in error.get("loc", [])),
+    # Procesar errores eliminando completamente los objetos no serializables.
+    # map(str, loc) corre en C y la list comprehension arma la lista sin
+    # appends intermedios; solo quedan campos string serializables
+    # (NO incluimos 'input', 'ctx', ni 'url').
+    errors_list = [
+        {
+            "field": " -> ".join(map(str, error.get("loc", ()))),
             "message": str(error.get("msg", "")),
             "type": str(error.get("type", ""))
-            # NO incluimos 'input', 'ctx', ni 'url' - solo campos string
         }
-        errors_list.append(clean_error)
-    
+        for error in exc.errors()
+    ]
+
     # Crear payload completamente limpio
     payload = {
         "success": False,
@@ -54,35 +64,43 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         "error_code": "VALIDATION_ERROR",
         "details": {"errors": errors_list}
     }
-    
-    return JSONResponse(status_code=422, content=payload)
+
+    return ORJSONResponse(status_code=422, content=payload)
 
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
     """
     Fallback para cualquier error no controlado (500).
     """
-    payload = ErrorResponse(
-        success=False,
-        message="Error interno del servidor",
-        error_code="INTERNAL_SERVER_ERROR",
-        details=None
-    ).model_dump()
-    return JSONResponse(status_code=500, content=payload)
+    return ORJSONResponse(status_code=500, content=_INTERNAL_ERR)
 
 # ========== ENDPOINTS ==========
 
+# CRUD de materiales (incluye el POST /materials/bulk)
+app.include_router(materials.router)
+
 @app.get("/")
 async def root():
     """Endpoint raíz de la API"""
     return {"message": "Bienvenido al Sistema de Gestión de Inventario 🏗️"}
 
-@app.post("/materials")
-def create_material(payload: MaterialCreate):
-    """Endpoint para crear un nuevo material (aún sin persistencia)"""
-    return {
-        "success": True,
-        "message": "Material recibido (aún sin guardar)",
-        "data": payload.model_dump()
-    }
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvloop + httptools: event loop y parser HTTP implementados en C,
+    # bastante más rápidos que los defaults asyncio/h11.
+    # uvloop no existe en Windows: ahí caemos al loop por defecto.
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "auto"
+
+    uvicorn.run(
+        "main:app",
+        host=settings.host,
+        port=settings.port,
+        loop=loop,
+        http="httptools"
+    )
 
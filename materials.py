@@ -1,11 +1,18 @@
-from fastapi import APIRouter, HTTPException
-from database import MaterialDatabase
+from typing import List
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import ORJSONResponse
+from database import MaterialDatabase, get_db
 from models import MaterialCreate, MaterialUpdate, MaterialResponse, MaterialListResponse
 router = APIRouter(tags=["materials"])
-db = MaterialDatabase()
+
+def db_dep() -> MaterialDatabase:
+    """Dependencia de FastAPI: entrega la instancia única de la base."""
+    return get_db()
 
 @router.post("/materials", status_code=201, response_model=MaterialResponse)
-def create_material(material: MaterialCreate):
+def create_material(material: MaterialCreate, db: MaterialDatabase = Depends(db_dep)):
     """
     Crea un nuevo material en el inventario usando un modelo Pydantic.
     - Validación automática (FastAPI + Pydantic).
@@ -15,92 +22,115 @@ def create_material(material: MaterialCreate):
     # Convertimos el modelo validado a dict
     data = material.model_dump()
     
-    # Guardado en memoria + persistencia
+    # Guardado en memoria + persistencia (add_material ya registra el cambio)
     created = db.add_material(data)
-    db.save_data()
-    
+
     return {
         "success": True,
         "message": "Material creado correctamente",
         "data": created
     }
 
-@router.get("/materials", response_model=MaterialListResponse)
-def list_materials():
-    items = db.list_materials()
+@router.post("/materials/bulk", status_code=201, response_model=MaterialListResponse)
+def create_materials_bulk(materials_in: List[MaterialCreate], db: MaterialDatabase = Depends(db_dep)):
+    """
+    Crea varios materiales en una sola petición.
+    - Valida cada elemento con MaterialCreate.
+    - Agrupa la persistencia en un solo flush con db.batch()
+      (una escritura a disco en vez de una por material).
+    """
+    created = []
+    with db.batch():
+        for material in materials_in:
+            created.append(db.add_material(material.model_dump()))
+
     return {
         "success": True,
-        "message": f"Se encontraron {len(items)} materiales",
-        "data": items,
-        "total": len(items)
+        "message": f"Se crearon {len(created)} materiales",
+        "data": created,
+        "total": len(created)
     }
 
-@router.get("/materials/{material_id}", response_model=MaterialResponse)
-def get_material(material_id: int):
+@router.get("/materials")
+def list_materials(db: MaterialDatabase = Depends(db_dep)):
+    """
+    Lista todos los materiales.
+    El cuerpo serializado se cachea en bytes (invalidado en cada mutación),
+    así las lecturas repetidas no vuelven a serializar el inventario.
+    """
+    body = db._list_cache_bytes
+    if body is None:
+        items = db.list_materials()
+        body = orjson.dumps({
+            "success": True,
+            "message": f"Se encontraron {len(items)} materiales",
+            "data": items,
+            "total": len(items)
+        })
+        db._list_cache_bytes = body
+    return Response(content=body, media_type="application/json")
+
+@router.get("/materials/{material_id}")
+def get_material(material_id: int, db: MaterialDatabase = Depends(db_dep)):
+    """
+    Devuelve un material por su ID.
+    Los datos vienen de nuestra propia base: no hace falta re-validarlos
+    con response_model, se serializan directo con ORJSONResponse.
+    """
     material = db.get_material(material_id)
     if material is None:
         raise HTTPException(
-            status_code=404, 
+            status_code=404,
             detail=f"Material con ID {material_id} no encontrado"
         )
-    return {
+    return ORJSONResponse({
         "success": True,
         "message": "Material encontrado correctamente",
         "data": material
-    }
+    })
 
-@router.put("/materials/{material_id}", response_model=MaterialResponse)
-def update_material(material_id: int, changes: MaterialUpdate):
+@router.put("/materials/{material_id}")
+def update_material(material_id: int, changes: MaterialUpdate, db: MaterialDatabase = Depends(db_dep)):
     """
     Actualiza los datos de un material existente usando MaterialUpdate (Pydantic).
     - Aplica solo los campos enviados (parcial).
     - Valida tipos y rangos automáticamente.
     - Persiste el cambio en inventory.json.
     """
-    # 1) Buscar el material
-    material = db.get_material(material_id)
+    # 1) Tomar únicamente los campos provistos en el body
+    update_data = changes.model_dump(exclude_unset=True)
+
+    # 2) Aplicar los cambios (la mutación queda registrada en el journal)
+    material = db.update_material(material_id, update_data)
     if material is None:
         raise HTTPException(
             status_code=404,
             detail=f"Material con ID {material_id} no encontrado"
         )
-    
-    # 2) Tomar únicamente los campos provistos en el body
-    update_data = changes.model_dump(exclude_unset=True)
-    
-    # 3) Aplicar los cambios en memoria
-    material.update(update_data)
-    db.materials[material_id] = material
-    
-    # 4) Guardar los cambios en el archivo JSON
-    db.save_data()
-    
-    # 5) Responder al cliente
-    return {
-        "success": True,
-        "message": f"Material con ID {material_id} actualizado correctamente",
-        "data": material
-    }
 
-@router.delete("/materials/{material_id}", response_model=MaterialResponse)
-def delete_material(material_id: int):
+    # 3) Responder al cliente; model_construct omite re-validar datos
+    #    que ya salieron validados de nuestra propia base
+    return MaterialResponse.model_construct(
+        success=True,
+        message=f"Material con ID {material_id} actualizado correctamente",
+        data=material
+    )
+
+@router.delete("/materials/{material_id}")
+def delete_material(material_id: int, db: MaterialDatabase = Depends(db_dep)):
     """
     Elimina un material por ID.
-    - Si existe: lo borra del diccionario en memoria y persiste el cambio en JSON.
+    - Si existe: lo borra de la memoria y persiste el cambio en el journal.
     - Si no existe: responde 404.
     """
-    material = db.get_material(material_id)
-    if material is None:
+    if not db.delete_material(material_id):
         raise HTTPException(
-            status_code=404, 
+            status_code=404,
             detail=f"Material con ID {material_id} no encontrado"
         )
-    
-    del db.materials[material_id]
-    db.save_data()
-    
-    return {
-    "success": True,
-    "message": f"Material con ID {material_id} eliminado correctamente",
-    "data": None
-}
\ No newline at end of file
+
+    return MaterialResponse.model_construct(
+        success=True,
+        message=f"Material con ID {material_id} eliminado correctamente",
+        data=None
+    )
\ No newline at end of file
@@ -1,7 +1,23 @@
-from typing import Optional, List
-from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, Optional, List
+from pydantic import (
+    BaseModel, ConfigDict, Field, StringConstraints, create_model, field_validator
+)
+from pydantic.fields import FieldInfo
 from datetime import date
 
+# Estados permitidos, construidos una sola vez a nivel de módulo
+# (un frozenset y el mensaje ya armado, en vez de una lista por validación)
+_ALLOWED_STATUSES = frozenset({"activo", "obsoleto", "en espera"})
+_ALLOWED_STATUSES_MSG = "activo, obsoleto, en espera"
+
+# Tipos string opcionales compartidos: campos con las mismas restricciones
+# reutilizan el mismo nodo de schema en pydantic-core en vez de clonar
+# un validador por campo
+ShortStr = Annotated[Optional[str], StringConstraints(max_length=100)]
+MediumStr = Annotated[Optional[str], StringConstraints(max_length=150)]
+SkuStr = Annotated[Optional[str], StringConstraints(max_length=50)]
+LongStr = Annotated[Optional[str], StringConstraints(max_length=1000)]
+
 class MaterialBase(BaseModel):
     # Nombre del material. Obligatorio.
     name: str = Field(..., min_length=1, max_length=200,
@@ -26,28 +42,28 @@ class MaterialBase(BaseModel):
                           description="Nombre del proveedor")
     
     # Descripción opcional del material.
-    description: Optional[str] = Field(
-        None, max_length=1000, description="Descripción del material")
+    description: LongStr = Field(
+        None, description="Descripción del material")
     
     # Nivel mínimo de stock. Opcional.
     minimum_stock: Optional[float] = Field(
         None, ge=0, description="Nivel mínimo de stock para alertas")
     
     # Ubicación en bodega. Opcional.
-    location: Optional[str] = Field(
-        None, max_length=100, description="Ubicación en bodega")
-    
+    location: ShortStr = Field(
+        None, description="Ubicación en bodega")
+
     # Obra o proyecto asignado. Opcional.
-    project: Optional[str] = Field(
-        None, max_length=150, description="Obra o proyecto al que pertenece")
-    
+    project: MediumStr = Field(
+        None, description="Obra o proyecto al que pertenece")
+
     # Responsable del material. Opcional.
-    responsible: Optional[str] = Field(
-        None, max_length=100, description="Persona responsable del material")
-    
+    responsible: ShortStr = Field(
+        None, description="Persona responsable del material")
+
     # Código interno (SKU). Opcional.
-    sku: Optional[str] = Field(
-        None, max_length=50, description="Código interno o SKU")
+    sku: SkuStr = Field(
+        None, description="Código interno o SKU")
     
     # Fecha de ingreso. Opcional.
     entry_date: Optional[date] = Field(
@@ -60,22 +76,16 @@ class MaterialBase(BaseModel):
     
     # --- VALIDACIONES PERSONALIZADAS ---
     
-    @field_validator('name')
-    @classmethod
-    def validate_name(cls, value: str) -> str:
-        """El nombre no puede estar vacío ni solo contener espacios."""
-        if not value.strip():
-            raise ValueError("El nombre no puede estar vacío o solo con espacios.")
-        return value.strip()
-    
-    @field_validator('category')
+    @field_validator('name', 'category')
     @classmethod
-    def validate_category(cls, value: str) -> str:
-        """La categoría no puede estar vacía."""
-        if not value.strip():
-            raise ValueError("La categoría no puede estar vacía o solo con espacios.")
-        return value.strip()
-    
+    def validate_not_blank(cls, value: str, info) -> str:
+        """Ni el nombre ni la categoría pueden estar vacíos o solo con espacios."""
+        stripped = value.strip()
+        if not stripped:
+            raise ValueError(
+                f"El campo '{info.field_name}' no puede estar vacío o solo con espacios.")
+        return stripped
+
     @field_validator('quantity')
     @classmethod
     def validate_quantity(cls, value: float) -> float:
@@ -104,128 +114,37 @@ class MaterialBase(BaseModel):
     @classmethod
     def validate_status(cls, value: str) -> str:
         """El estado debe ser uno de los valores permitidos."""
-        allowed_statuses = ['activo', 'obsoleto', 'en espera']
-        if value.lower() not in allowed_statuses:
-            raise ValueError(f"El estado debe ser uno de: {', '.join(allowed_statuses)}")
-        return value.lower()
+        normalized = value.lower()
+        if normalized not in _ALLOWED_STATUSES:
+            raise ValueError(f"El estado debe ser uno de: {_ALLOWED_STATUSES_MSG}")
+        return normalized
 
 class MaterialCreate(MaterialBase):
     """Modelo usado para crear un nuevo material (POST)."""
     pass
-from fastapi import APIRouter, HTTPException
-from database import MaterialDatabase
-from models import MaterialCreate  # ← AGREGA ESTA LÍNEA
-
-router = APIRouter(tags=["materials"])
-db = MaterialDatabase()
 
-@router.post("/materials", status_code=201)
-def create_material(material: MaterialCreate):
-    """
-    Crea un nuevo material en el inventario usando un modelo Pydantic.
-    - Validación automática (FastAPI + Pydantic).
-    - Asigna un ID incremental.
-    - Persiste el nuevo material en inventory.json.
-    """
-    # Convertimos el modelo validado a dict
-    data = material.model_dump()
-    
-    # Guardado en memoria + persistencia
-    created = db.add_material(data)
-    db.save_data()
-    
-    return {
-        "success": True,
-        "message": "Material creado correctamente",
-        "data": created
-    }
-class MaterialUpdate(BaseModel):
-    """Modelo usado para actualizar parcialmente un material existente."""
-    name: Optional[str] = Field(None, min_length=1, max_length=200)
-    category: Optional[str] = Field(None, min_length=1, max_length=100)
-    quantity: Optional[float] = Field(None, ge=0)
-    unit: Optional[str] = Field(None, min_length=1, max_length=20)
-    unit_price: Optional[float] = Field(None, ge=0.0)
-    supplier: Optional[str] = Field(None, min_length=1, max_length=150)
-    description: Optional[str] = Field(None, max_length=1000)
-    minimum_stock: Optional[float] = Field(None, ge=0)
-    location: Optional[str] = Field(None, max_length=100)
-    project: Optional[str] = Field(None, max_length=150)
-    responsible: Optional[str] = Field(None, max_length=100)
-    sku: Optional[str] = Field(None, max_length=50)
-    entry_date: Optional[date] = None
-    status: Optional[str] = Field(None, max_length=20)
-
-@router.get("/materials")
-def list_materials():
-    """
-    Endpoint para listar todos los materiales.
-    Retorna una lista de diccionarios con los datos actuales del inventario.
-    """
-    return db.list_materials()
-
-@router.get("/materials/{material_id}")
-def get_material(material_id: int):
-    """
-    Devuelve un material por su ID.
-    - Si existe, retorna el objeto (dict) con sus campos.
-    - Si no existe, lanza un 404 con un mensaje claro.
-    """
-    material = db.get_material(material_id)
-    if material is None:
-        raise HTTPException(
-            status_code=404, 
-            detail=f"Material con ID {material_id} no encontrado"
+# Modelo de actualización parcial generado desde MaterialBase: cada campo
+# se vuelve Optional con default None, reutilizando las restricciones
+# (min_length, ge, etc.) sin duplicar la declaración campo por campo.
+MaterialUpdate = create_model(
+    "MaterialUpdate",
+    __doc__="Modelo usado para actualizar parcialmente un material existente.",
+    **{
+        name: (
+            Optional[field.annotation],
+            FieldInfo.merge_field_infos(field, FieldInfo(default=None)),
         )
-    return material
-
-@router.put("/materials/{material_id}")
-def update_material(material_id: int, payload: dict):
-    """
-    Actualiza los datos de un material existente.
-    - Busca el ID.
-    - Aplica solo los campos enviados.
-    - Guarda los cambios en el JSON.
-    """
-    material = db.get_material(material_id)
-    if material is None:
-        raise HTTPException(
-            status_code=404, 
-            detail=f"Material con ID {material_id} no encontrado"
-        )
-    
-    material.update(payload)
-    db.materials[material_id] = material
-    db.save_data()
-    
-    return {
-        "success": True,
-        "message": f"Material con ID {material_id} actualizado correctamente",
-        "data": material
-    }
+        for name, field in MaterialBase.model_fields.items()
+    },
+)
 
-@router.delete("/materials/{material_id}")
-def delete_material(material_id: int):
-    """
-    Elimina un material por ID.
-    - Si existe: lo borra del diccionario en memoria y persiste el cambio en JSON.
-    - Si no existe: responde 404.
-    """
-    material = db.get_material(material_id)
-    if material is None:
-        raise HTTPException(
-            status_code=404, 
-            detail=f"Material con ID {material_id} no encontrado"
-        )
-    
-    del db.materials[material_id]
-    db.save_data()
-    
-    return {
-        "success": True,
-        "message": f"Material con ID {material_id} eliminado correctamente"
-    }
 class MaterialResponse(BaseModel):
+    # El SchemaValidator (Rust) se construye recién en el primer uso,
+    # no al importar el módulo: menos memoria y arranque más rápido.
+    # Los modelos de request body (MaterialBase/MaterialUpdate) quedan
+    # eager: FastAPI los construye al registrar las rutas de todas formas.
+    model_config = ConfigDict(defer_build=True)
+
     success: bool = Field(..., description="Indica si la operación fue exitosa")
     message: str = Field(..., description="Mensaje breve para el cliente")
     data: Optional[dict] = Field(
@@ -233,6 +152,8 @@ class MaterialResponse(BaseModel):
         description="Material devuelto (dict) o None si no aplica"
     )
 class MaterialListResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     success: bool = Field(..., description="Indica si la operación fue exitosa")
     message: str = Field(..., description="Mensaje para el cliente")
     data: List[dict] = Field(
@@ -241,6 +162,8 @@ class MaterialListResponse(BaseModel):
     )
     total: int = Field(..., description="Cantidad total de elementos devueltos")
 class ErrorResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     success: bool = Field(False, description="Siempre False en errores")
     message: str = Field(..., description="Mensaje breve para el cliente")
     error_code: Optional[str] = Field(None, description="Código interno opcional")